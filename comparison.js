@@ -0,0 +1,111 @@
+// per-test data lives in data/<test>.js and is pulled in on demand; a
+// script tag (unlike fetch) also works when the page is opened from disk
+const tests = {};
+const metrics = {};
+let currentTest = '';
+let currentFunction = '';
+const testSelect = document.getElementById('testSelect');
+const funcSelect = document.getElementById('functionSelect');
+const imageContainer = document.getElementById('imageContainer');
+const metricsDiv = document.getElementById('metrics');
+const metricsGrid = document.getElementById('metricsGrid');
+
+testSelect.addEventListener('change', function(e) {
+    showTest(e.target.value);
+});
+
+funcSelect.addEventListener('change', function(e) {
+    currentFunction = e.target.value;
+    updateDisplay();
+});
+
+function loadTest(name, onLoaded) {
+    if (!name || tests[name]) { onLoaded(); return; }
+    const script = document.createElement('script');
+    script.src = `data/${encodeURIComponent(name)}.js`;
+    script.onload = onLoaded;
+    // a missing data file still refreshes the page, which then shows the
+    // empty state instead of the previous test's functions
+    script.onerror = function() { script.remove(); onLoaded(); };
+    document.head.appendChild(script);
+}
+
+function showTest(name) {
+    currentTest = name;
+    loadTest(name, function() {
+        if (currentTest !== name) { return; }  // superseded by a newer selection
+        updateFunctionList();
+        updateDisplay();
+        if (metricsDiv.classList.contains('show')) { updateMetrics(); }
+    });
+}
+
+function updateFunctionList() {
+    funcSelect.innerHTML = '<option value="">Select a function...</option>';
+    funcSelect.disabled = true;
+    if (currentTest && tests[currentTest]) {
+        funcSelect.disabled = false;
+        const functions = Object.keys(tests[currentTest]).sort((a, b) => a.localeCompare(b, undefined, {numeric: true}));
+        functions.forEach(funcKey => {
+            const option = document.createElement('option');
+            option.value = funcKey;
+            option.textContent = tests[currentTest][funcKey].display_name;
+            funcSelect.appendChild(option);
+        });
+        if (functions.length > 0) {
+            // Auto-select the first function (often 'main')
+            const mainFunc = functions.find(f => tests[currentTest][f].display_name === 'main') || functions[0];
+            funcSelect.value = mainFunc;
+            currentFunction = mainFunc;
+        }
+    }
+}
+
+function updateDisplay() {
+    if (!currentTest || !currentFunction || !tests[currentTest]?.[currentFunction]) {
+        imageContainer.innerHTML = '<div class="no-data">Select a test and function to view comparison</div>';
+    } else {
+        const images = tests[currentTest][currentFunction];
+        imageContainer.innerHTML = `
+            <div class="image-wrapper"><h3>Original</h3><img src="../../${images.original}" alt="Original CFG" loading="lazy"></div>
+            <div class="image-wrapper"><h3>Obfuscated</h3><img src="../../${images.obfuscated}" alt="Obfuscated CFG" loading="lazy"></div>`;
+    }
+}
+
+function toggleMetrics() {
+    if (!metricsDiv.classList.contains('show')) { updateMetrics(); }
+    metricsDiv.classList.toggle('show');
+}
+
+function updateMetrics() {
+    if (currentTest && metrics[currentTest] && Object.keys(metrics[currentTest]).length > 0) {
+        const m = metrics[currentTest];
+        const o = m.obfuscationMetrics || {};
+        const cff = o.controlFlowFlattening || { "flattenedFunctions": 0, "flattenedBlocks": 0 };
+        const se = o.stringEncryption || { "count": 0 };
+        const fci = o.fakeCodeInsertion || { "insertedBlocks": 0 };
+        const passes = (o.passesRun || []).join('<br>') || 'None';
+        const attrs = m.outputAttributes || {};
+        const bin = m.binary_metrics || {};
+        metricsGrid.innerHTML = `
+            <div class="metric-card"><div class="value">${bin.change_pct || 'N/A'}</div><div class="label">Exec Size Change</div><div class="sub-label">${bin.original_size || '?'} &rarr; ${bin.obfuscated_size || '?'}</div></div>
+            <div class="metric-card"><div class="value">${attrs.totalIRSizeChange || 'N/A'}</div><div class="label">IR Size Change</div><div class="sub-label">${attrs.originalIRSize || '?'} &rarr; ${attrs.obfuscatedIRSize || '?'}</div></div>
+            <div class="metric-card"><div class="value">${cff.flattenedFunctions}</div><div class="label">Flattened Funcs</div></div>
+            <div class="metric-card"><div class="value">${cff.flattenedBlocks}</div><div class="label">Flattened Blocks</div></div>
+            <div class="metric-card"><div class="value">${se.count}</div><div class="label">Strings Encrypted</div></div>
+            <div class="metric-card"><div class="value">${fci.insertedBlocks}</div><div class="label">Fake Blocks</div></div>
+            <div class="metric-card"><div class="value small-text">${passes}</div><div class="label">Passes Run</div></div>
+            <div class="metric-card"><div class="value">${o.cyclesCompleted || 1}</div><div class="label">Cycles</div></div>`;
+    } else {
+        metricsGrid.innerHTML = `<div class="metric-card" style="grid-column: 1 / -1;"><div class="label">No report data. Select a test to see its metrics.</div></div>`;
+    }
+}
+
+// Initial setup
+(function() {
+    updateMetrics();
+    if (testSelect.options.length > 1) {
+        testSelect.value = testSelect.options[1].value;
+        showTest(testSelect.value);
+    }
+})();
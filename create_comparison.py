@@ -1,13 +1,17 @@
 #!/usr/bin/env python3
+import atexit
+import hashlib
 import json
 import os
 import platform
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
 import webbrowser
 from argparse import ArgumentParser, RawDescriptionHelpFormatter
-from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # --- optional dependency: tqdm for progress bars ---
@@ -24,18 +28,126 @@ except ImportError:
         return iterable
 
 
+# --- optional dependency: orjson for faster json (de)serialization ---
+try:
+    import orjson
+
+    def json_loads(data):
+        return orjson.loads(data)
+
+    def json_dumps(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+
+    def json_loads(data):
+        return json.loads(data)
+
+    def json_dumps(obj):
+        return json.dumps(obj, separators=(",", ":"), ensure_ascii=False)
+
+
 # --- configuration ---
 script_dir = Path(__file__).parent.resolve()
 project_root = script_dir
 build_dir = project_root / "build"
 results_dir = script_dir / "test_results"
+tests_dir = project_root / "tests"
+ll_dir = results_dir / "ll_files"
+reports_dir = results_dir / "reports"
+binaries_dir = results_dir / "binaries"
+orig_dot_dir = results_dir / "dot_files" / "original"
+obf_dot_dir = results_dir / "dot_files" / "obfuscated"
+orig_viz_dir = results_dir / "visualizations" / "original"
+obf_viz_dir = results_dir / "visualizations" / "obfuscated"
+comparison_dir = results_dir / "visualizations" / "comparison"
+render_cache_file = results_dir / ".render_cache.json"
+opt_cache_file = results_dir / ".opt_cache.json"
+report_index_file = results_dir / ".report_index.json"
+template_file = script_dir / "comparison_template.html"
+# static page assets, published under content-hashed names so browsers can
+# cache them indefinitely; keyed by the template placeholder they fill
+page_assets = {
+    "STYLE_HREF": script_dir / "comparison.css",
+    "SCRIPT_SRC": script_dir / "comparison.js",
+}
+node_id_re = re.compile(rb"Node0x[0-9a-fA-F]+")
+placeholder_re = re.compile(r"\{\{(\w+)\}\}")
+sanitize_table = str.maketrans(dict.fromkeys(":<> ", "_"))
+# pipelines whose reports can back the metrics panel, most preferred first;
+# 'full' is picked whenever it exists for consistency across tests.
+report_types = ["full", "cff", "string", "fake"]
+obfuscated_suffixes = frozenset(report_types)
+exe_suffix = ".exe" if platform.system() == "Windows" else ""
+dot_batch_size = 64  # .dot files handed to each dot process
+dot_cmdline_budget = 7500  # chars of file names per batch, under windows' 8191
+
+
+# `brew --prefix llvm` is cached here; the homebrew checkout's HEAD (apple
+# silicon or intel layout) moves on `brew update`, invalidating the entry.
+brew_cache_file = Path.home() / ".cache" / "chakravyuha" / "brew_llvm_prefix"
+homebrew_heads = [
+    Path("/opt/homebrew/.git/HEAD"),
+    Path("/usr/local/Homebrew/.git/HEAD"),
+]
+resolved_tools = {}
 
 
 # --- helper functions ---
 def find_executable(name, msg):
-    if not shutil.which(name):
-        print(f"error: {msg}", file=sys.stderr)
-        sys.exit(1)
+    """Resolves a tool once; CHAKRAVYUHA_<NAME> overrides the PATH lookup."""
+    if name not in resolved_tools:
+        env_var = f"CHAKRAVYUHA_{name.upper()}"
+        override = os.environ.get(env_var)
+        if override:
+            path = shutil.which(override)
+            msg = f"{env_var} is set to '{override}', which is not an executable."
+        else:
+            path = shutil.which(name)
+        if not path:
+            print(f"error: {msg}", file=sys.stderr)
+            sys.exit(1)
+        resolved_tools[name] = path
+    return resolved_tools[name]
+
+
+def homebrew_llvm_prefix():
+    """Returns `brew --prefix llvm`, memoized until homebrew itself changes."""
+    stamp = next(
+        (str(head.stat().st_mtime_ns) for head in homebrew_heads if head.exists()),
+        None,
+    )
+    if stamp:
+        try:
+            cached_stamp, prefix = brew_cache_file.read_text().splitlines()
+            if cached_stamp == stamp:
+                return prefix
+        except (FileNotFoundError, ValueError):
+            pass
+
+    result = subprocess.run(
+        ["brew", "--prefix", "llvm"], capture_output=True, text=True, check=True
+    )
+    prefix = result.stdout.strip()
+    if stamp:
+        brew_cache_file.parent.mkdir(parents=True, exist_ok=True)
+        brew_cache_file.write_text(f"{stamp}\n{prefix}\n")
+    return prefix
+
+
+def list_files(directory, ext):
+    """Names of the files in directory ending with ext, from a single scandir."""
+    with os.scandir(directory) as entries:
+        return [entry.name for entry in entries if entry.name.endswith(ext)]
+
+
+def publish_asset(source, target_dir):
+    """Copies source into target_dir as '<stem>.<hash><suffix>', once."""
+    data = source.read_bytes()
+    digest = hashlib.blake2b(data, digest_size=8).hexdigest()
+    name = f"{source.stem}.{digest}{source.suffix}"
+    target = target_dir / name
+    if not target.exists():
+        target.write_bytes(data)
     return name
 
 
@@ -53,30 +165,218 @@ def format_bytes(size):
     return f"{size:.2f} {labels[n]}"
 
 
+def dot_digest(dot_file):
+    """Hashes a .dot file, ignoring the address-based node ids opt emits."""
+    node_ids = {}
+    normalized = node_id_re.sub(
+        lambda m: b"Node%d" % node_ids.setdefault(m.group(), len(node_ids)),
+        dot_file.read_bytes(),
+    )
+    return hashlib.blake2b(normalized, digest_size=16).hexdigest()
+
+
+def load_cache(cache_file):
+    """Loads a json sidecar cache, or an empty one if it is missing or corrupt."""
+    try:
+        with open(cache_file, "r") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, FileNotFoundError):
+        return {}
+
+
+def save_cache(cache_file, cache):
+    with open(cache_file, "w") as f:
+        json.dump(cache, f, indent=2, sort_keys=True)
+
+
+def load_report(report_file):
+    """Returns the parsed json report, or None if it is missing or malformed."""
+    try:
+        return json_loads(report_file.read_bytes())
+    except (json.JSONDecodeError, FileNotFoundError):
+        return None
+
+
+def index_reports(reports_dir):
+    """Maps each test name to its preferred (report_type, path).
+
+    The index is persisted next to the results and reused as long as the
+    reports directory is unmodified, i.e. no report was added or removed.
+    """
+    dir_mtime = reports_dir.stat().st_mtime_ns
+    report_index = load_cache(report_index_file)
+    if report_index.get("mtime") != dir_mtime:
+        by_test = {}
+        with os.scandir(reports_dir) as entries:
+            for entry in entries:
+                stem, ext = os.path.splitext(entry.name)
+                test_name, _, report_type = stem.rpartition("_")
+                if ext != ".json" or report_type not in report_types:
+                    continue
+                current = by_test.get(test_name)
+                rank = report_types.index(report_type)
+                if current is None or rank < report_types.index(current["type"]):
+                    by_test[test_name] = {"type": report_type, "file": entry.name}
+        report_index = {"mtime": dir_mtime, "reports": by_test}
+        save_cache(report_index_file, report_index)
+
+    return {
+        test_name: (report["type"], reports_dir / report["file"])
+        for test_name, report in report_index["reports"].items()
+    }
+
+
+def chunk_dot_names(dot_names):
+    """Splits .dot names into batches bounded by count and command-line length."""
+    batch, batch_len = [], 0
+    for name in dot_names:
+        if batch and (
+            len(batch) >= dot_batch_size
+            or batch_len + len(name) + 1 > dot_cmdline_budget
+        ):
+            yield batch
+            batch, batch_len = [], 0
+        batch.append(name)
+        batch_len += len(name) + 1
+    if batch:
+        yield batch
+
+
+def build_test_name_trie(test_names):
+    """Builds a trie over the '_'-separated segments of the test names."""
+    trie = {}
+    for name in test_names:
+        node = trie
+        for segment in name.split("_"):
+            node = node.setdefault(segment, {})
+        node[None] = name  # None marks the end of a test name
+    return trie
+
+
+def split_image_stem(test_name_trie, stem):
+    """Splits '<test>_<function>' on the longest known test name, or None."""
+    parts = stem.split("_")
+    node, match = test_name_trie, None
+    for i, segment in enumerate(parts):
+        node = node.get(segment)
+        if node is None:
+            break
+        func_name = "_".join(parts[i + 1 :])
+        if None in node and func_name:
+            match = (node[None], func_name)
+    return match
+
+
 def sanitize_func_name(name):
     """Replaces characters invalid in filenames with underscores."""
-    return name.replace(":", "_").replace("<", "_").replace(">", "_").replace(" ", "_")
+    return name.translate(sanitize_table)
 
 
 def desanitize_func_name(name):
     return name.replace("__", "::")
 
 
-# --- parallel rendering task ---
-def render_dot_to_png(dot_file_info):
-    dot_file, dot_executable = dot_file_info
-    is_original = dot_file.parent.name == "original"
-    viz_dir = (
-        results_dir / "visualizations" / ("original" if is_original else "obfuscated")
-    )
-    png_file = viz_dir / f"{dot_file.stem}.png"
-
+# --- parallel tasks ---
+worker_tools = {}  # resolved tool paths shared by the pool threads
+worker_pool = None
+
+
+def get_pool():
+    """Returns the thread pool shared by every parallel stage, creating it once.
+
+    the tasks only wait on opt/dot subprocesses or on file reads, so threads
+    are enough. each opt/dot child is cpu-bound, so the pool gets one thread
+    per cpu this process may run on (the affinity mask, which containers and
+    ci runners restrict).
+    """
+    global worker_pool
+    if worker_pool is None:
+        if hasattr(os, "sched_getaffinity"):
+            cpus = len(os.sched_getaffinity(0))
+        else:
+            cpus = os.cpu_count() or 1
+        worker_pool = ThreadPoolExecutor(max_workers=cpus)
+        atexit.register(worker_pool.shutdown)
+    return worker_pool
+
+
+def dot_target(ll_file):
+    """Returns the dot directory and base test name an IR file's graphs go to."""
+    test_name = ll_file.stem
+    # one split yields both the classification and the base test name
+    head, sep, suffix = test_name.rpartition("_")
+    if sep and suffix in obfuscated_suffixes:
+        return obf_dot_dir, head
+    return orig_dot_dir, test_name
+
+
+def generate_dot_files(ll_file_info):
+    """Runs opt's dot-cfg pass on one IR file and files away the results.
+
+    Returns the dot directory, the base test name, the new .dot names and the
+    digest of the IR and the opt binary. opt is skipped when that still
+    matches the cached entry and the .dot files it produced last time are in
+    place.
+    """
+    ll_file, cached = ll_file_info
+    target_dir, base_name = dot_target(ll_file)
+
+    ll_digest = hashlib.blake2b(
+        worker_tools["opt"].encode() + b"\0" + ll_file.read_bytes(), digest_size=16
+    ).hexdigest()
+    if (
+        cached
+        and cached["digest"] == ll_digest
+        and all((target_dir / name).exists() for name in cached["dots"])
+    ):
+        return target_dir, base_name, cached["dots"], ll_digest
+
+    # opt writes the .dot files into its working directory; a private one per
+    # task keeps concurrent runs from picking up each other's output. it lives
+    # next to the target so the renames below stay on the same filesystem.
+    with tempfile.TemporaryDirectory(dir=target_dir.parent) as tmp_dir:
+        subprocess.run(
+            [worker_tools["opt"], "-passes=dot-cfg", "-disable-output", str(ll_file)],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            cwd=tmp_dir,
+        )
+        target_dir_str = str(target_dir)
+        dot_names = []
+        with os.scandir(tmp_dir) as entries:
+            for entry in entries:
+                if not entry.name.endswith(".dot"):
+                    continue
+                func_name = entry.name[: -len(".dot")].strip(".")
+                sanitized_name = sanitize_func_name(func_name)
+                new_name = f"{base_name}_{sanitized_name}.dot"
+                os.replace(entry.path, os.path.join(target_dir_str, new_name))
+                dot_names.append(new_name)
+    return target_dir, base_name, dot_names, ll_digest
+
+
+def render_dot_batch(batch_info):
+    """Renders a batch of .dot files with a single dot process.
+
+    Returns (rendered, destination) pairs for the images that were produced.
+    """
+    dot_dir, dot_names, viz_dir = batch_info
+
+    # -O names each output '<input>.png' next to its input, so the dot
+    # directory doubles as a staging area; the caller moves everything into
+    # the visualization directory once all batches are done.
     subprocess.run(
-        [dot_executable, "-Tpng", str(dot_file), "-o", str(png_file)],
+        [worker_tools["dot"], "-Tpng", "-O", *dot_names],
         stdout=subprocess.DEVNULL,
         stderr=subprocess.DEVNULL,
+        cwd=dot_dir,
     )
-    return True
+    staged = []
+    for dot_name in dot_names:
+        rendered = dot_dir / f"{dot_name}.png"
+        if rendered.exists():
+            staged.append((rendered, viz_dir / f"{Path(dot_name).stem}.png"))
+    return staged
 
 
 # --- core logic ---
@@ -90,8 +390,9 @@ def generate_visualizations():
         "'dot' (from graphviz) not found. is graphviz installed and in your path?",
     )
 
-    ll_dir = results_dir / "ll_files"
-    if not ll_dir.exists() or not any(ll_dir.glob("*.ll")):
+    # run_tests.py keeps bitcode unless asked for text; opt reads either
+    ll_names = list_files(ll_dir, (".ll", ".bc")) if ll_dir.exists() else []
+    if not ll_names:
         print(
             f"error: llvm ir directory '{ll_dir}' is empty or not found.",
             file=sys.stderr,
@@ -102,306 +403,241 @@ def generate_visualizations():
         )
         return False
 
-    orig_dot_dir = results_dir / "dot_files" / "original"
-    obf_dot_dir = results_dir / "dot_files" / "obfuscated"
-    orig_viz_dir = results_dir / "visualizations" / "original"
-    obf_viz_dir = results_dir / "visualizations" / "obfuscated"
     for d in [orig_dot_dir, obf_dot_dir, orig_viz_dir, obf_viz_dir]:
         d.mkdir(parents=True, exist_ok=True)
 
-    print("generating cfg .dot files...")
-    for old_dot in script_dir.glob("*.dot"):
-        old_dot.unlink()
-
-    for ll_file in ll_dir.glob("*.ll"):
-        subprocess.run(
-            [opt, "-passes=dot-cfg", str(ll_file)],
-            stdout=subprocess.DEVNULL,
-            stderr=subprocess.DEVNULL,
-            cwd=script_dir,
-        )
+    print("generating and rendering cfg .dot files...")
+    opt_cache = load_cache(opt_cache_file)
+    render_cache = load_cache(render_cache_file)
+    dot_digests = {}
+    viz_dirs = {orig_dot_dir: orig_viz_dir, obf_dot_dir: obf_viz_dir}
+    # a graph identical to one rendered before is copied rather than rendered
+    rendered_pngs = {}
+    for cache_key, digest in render_cache.items():
+        dot_file = results_dir / cache_key
+        if dot_file.parent in viz_dirs:
+            png_file = viz_dirs[dot_file.parent] / f"{dot_file.stem}.png"
+            rendered_pngs[digest] = png_file
+    # png names per visualization directory, handed to create_comparison_html
+    pngs = {orig_viz_dir: [], obf_viz_dir: []}
+    pending = {orig_dot_dir: [], obf_dot_dir: []}
+    render_futures = []
+
+    # every obfuscated pipeline of a test writes the same .dot names, so a
+    # test's files are only final once all of its opt runs have finished
+    opt_runs_left = {}
+    for ll_name in ll_names:
+        target = dot_target(ll_dir / ll_name)
+        opt_runs_left[target] = opt_runs_left.get(target, 0) + 1
+    produced = {}
+
+    # the shared pool serves both stages: dot batches are submitted as soon
+    # as opt has produced enough final files to fill them.
+    worker_tools.update(opt=opt, dot=dot)
+    executor = get_pool()
+    opt_futures = {
+        executor.submit(
+            generate_dot_files,
+            (ll_dir / ll_name, opt_cache.get(ll_name)),
+        ): ll_name
+        for ll_name in ll_names
+    }
+    for future in as_completed(opt_futures):
+        dot_dir, base_name, dot_names, ll_digest = future.result()
+        if dot_names:
+            opt_cache[opt_futures[future]] = {"digest": ll_digest, "dots": dot_names}
+        target = (dot_dir, base_name)
+        produced.setdefault(target, set()).update(dot_names)
+        opt_runs_left[target] -= 1
+        if opt_runs_left[target]:
+            continue
+        viz_dir = viz_dirs[dot_dir]
+        for dot_name in sorted(produced.pop(target)):
+            dot_file = dot_dir / dot_name
+            cache_key = dot_file.relative_to(results_dir).as_posix()
+            dot_digests[cache_key] = dot_digest(dot_file)
+            png_file = viz_dir / f"{dot_file.stem}.png"
+            if render_cache.get(cache_key) == dot_digests[cache_key] and (
+                png_file.exists()
+            ):
+                pngs[viz_dir].append(png_file.name)
+                continue
+            rendered_png = rendered_pngs.get(dot_digests[cache_key])
+            if rendered_png and rendered_png.exists():
+                shutil.copyfile(rendered_png, png_file)
+                # png_file no longer shows its old graph, so later lookups of
+                # that digest must not copy from it
+                if rendered_pngs.get(render_cache.get(cache_key)) == png_file:
+                    del rendered_pngs[render_cache[cache_key]]
+                rendered_pngs[dot_digests[cache_key]] = png_file
+                render_cache[cache_key] = dot_digests[cache_key]
+                pngs[viz_dir].append(png_file.name)
+                continue
+            pending[dot_dir].append(dot_name)
+        # the last batch may still have room, so it waits for more files
+        *ready, pending[dot_dir] = list(chunk_dot_names(pending[dot_dir])) or [[]]
+        for batch in ready:
+            render_futures.append(
+                executor.submit(render_dot_batch, (dot_dir, batch, viz_dir))
+            )
+    for dot_dir, dot_names in pending.items():
+        if dot_names:
+            render_futures.append(
+                executor.submit(
+                    render_dot_batch, (dot_dir, dot_names, viz_dirs[dot_dir])
+                )
+            )
 
-        test_name = ll_file.stem
-        is_obfuscated = any(
-            f"_{suf}" in test_name for suf in ["cff", "string", "fake", "full"]
-        )
-        target_dir = obf_dot_dir if is_obfuscated else orig_dot_dir
-        base_name = "_".join(test_name.split("_")[:-1]) if is_obfuscated else test_name
-
-        for dot_file in script_dir.glob("*.dot"):
-            func_name = dot_file.stem.strip(".")
-            sanitized_name = sanitize_func_name(func_name)
-            new_name = f"{base_name}_{sanitized_name}.dot"
-            dot_file.rename(target_dir / new_name)
-
-    print("rendering cfg images in parallel...")
-    all_dots = list(orig_dot_dir.glob("*.dot")) + list(obf_dot_dir.glob("*.dot"))
-    if not all_dots:
+    context = {"orig_pngs": pngs[orig_viz_dir], "obf_pngs": pngs[obf_viz_dir]}
+    if not dot_digests:
         print("Warning: No .dot files found to render.")
-        return True
-
-    with ProcessPoolExecutor() as executor:
-        tasks = [(dot_file, dot) for dot_file in all_dots]
-        list(
-            tqdm(
-                executor.map(render_dot_to_png, tasks),
-                total=len(tasks),
-                desc="rendering images",
-            )
+        return context
+    save_cache(opt_cache_file, opt_cache)
+    if not render_futures:
+        save_cache(render_cache_file, render_cache)
+        print("all cfg images are up to date.")
+        return context
+
+    staged_batches = [
+        future.result()
+        for future in tqdm(
+            as_completed(render_futures),
+            total=len(render_futures),
+            desc="rendering images",
         )
+    ]
+
+    for staged in staged_batches:
+        for rendered, png_file in staged:
+            os.replace(rendered, png_file)
+            pngs[png_file.parent].append(png_file.name)
+            cache_key = rendered.with_suffix("").relative_to(results_dir).as_posix()
+            render_cache[cache_key] = dot_digests[cache_key]
+    save_cache(render_cache_file, render_cache)
 
     print("image rendering complete.")
-    return True
+    return context
+
 
+def create_comparison_html(context=None):
+    """Writes the html report.
 
-def create_comparison_html():
+    context is what generate_visualizations returned; without it the
+    visualization directories are scanned instead.
+    """
     print("generating interactive html report...")
-    comparison_dir = results_dir / "visualizations" / "comparison"
     comparison_dir.mkdir(parents=True, exist_ok=True)
 
     tests = {}
-    orig_dir = results_dir / "visualizations" / "original"
-    obf_dir = results_dir / "visualizations" / "obfuscated"
-
-    c_test_files = (project_root / "tests").glob("test_*.c")
-    cpp_test_files = (project_root / "tests").glob("test_*.cpp")
-    all_test_files = list(c_test_files) + list(cpp_test_files)
-    known_test_names = sorted([p.stem for p in all_test_files])
-
-    if orig_dir.exists():
-        for orig_img in orig_dir.glob("*.png"):
-            for test_name in known_test_names:
-                prefix = f"{test_name}_"
-                if orig_img.stem.startswith(prefix):
-                    sanitized_func_name = orig_img.stem[len(prefix) :]
-                    obf_img = obf_dir / orig_img.name
-                    if obf_img.exists():
-                        if test_name not in tests:
-                            tests[test_name] = {}
-
-                        # Store by sanitized name for lookup, but display desanitized name
-                        tests[test_name][sanitized_func_name] = {
-                            "display_name": desanitize_func_name(sanitized_func_name),
-                            "original": str(orig_img.relative_to(results_dir)),
-                            "obfuscated": str(obf_img.relative_to(results_dir)),
-                        }
-                        break
+
+    with os.scandir(tests_dir) as entries:
+        known_test_names = sorted(
+            os.path.splitext(entry.name)[0]
+            for entry in entries
+            if entry.name.startswith("test_") and entry.name.endswith((".c", ".cpp"))
+        )
+
+    if context is not None:
+        orig_pngs = context["orig_pngs"]
+        obf_names = set(context["obf_pngs"])
+    elif orig_viz_dir.exists() and obf_viz_dir.exists():
+        orig_pngs = list_files(orig_viz_dir, ".png")
+        with os.scandir(obf_viz_dir) as entries:
+            obf_names = {entry.name for entry in entries}
+    else:
+        orig_pngs, obf_names = [], set()
+
+    if known_test_names:
+        test_name_trie = build_test_name_trie(known_test_names)
+
+        for png_name in orig_pngs:
+            match = split_image_stem(test_name_trie, png_name[: -len(".png")])
+            if not match or png_name not in obf_names:
+                continue
+            test_name, sanitized_func_name = match
+            if test_name not in tests:
+                tests[test_name] = {}
+
+            # Store by sanitized name for lookup, but display desanitized name.
+            # the layout under results_dir is fixed, so the page-relative urls
+            # are plain concatenations.
+            tests[test_name][sanitized_func_name] = {
+                "display_name": desanitize_func_name(sanitized_func_name),
+                "original": "visualizations/original/" + png_name,
+                "obfuscated": "visualizations/obfuscated/" + png_name,
+            }
+
+    if not tests:
+        print("no matching cfg images found; skipping the html report.")
+        return None
 
     metrics = {}
-    reports_dir = results_dir / "reports"
-    binaries_dir = results_dir / "binaries"
+
+    binary_sizes = {}
+    if binaries_dir.exists():
+        with os.scandir(binaries_dir) as entries:
+            binary_sizes = {
+                entry.name: entry.stat().st_size for entry in entries if entry.is_file()
+            }
 
     if reports_dir.exists():
-        for test_name in known_test_names:
-            report_to_load = None
-            report_type = "full"  # Prioritize 'full' report for consistency
-
-            potential_path = reports_dir / f"{test_name}_{report_type}.json"
-            if potential_path.exists():
-                report_to_load = potential_path
-
-            if report_to_load:
-                try:
-                    with open(report_to_load, "r") as f:
-                        metrics[test_name] = json.load(f)
-
-                    exe_suffix = ".exe" if platform.system() == "Windows" else ""
-                    orig_bin = binaries_dir / f"{test_name}_original{exe_suffix}"
-                    obf_bin = binaries_dir / f"{test_name}_{report_type}{exe_suffix}"
-
-                    orig_size = orig_bin.stat().st_size if orig_bin.exists() else None
-                    obf_size = obf_bin.stat().st_size if obf_bin.exists() else None
-
-                    change_str = "N/A"
-                    if orig_size is not None and obf_size is not None and orig_size > 0:
-                        change_pct = (obf_size - orig_size) / orig_size * 100
-                        change_str = f"{change_pct:+.2f}%"
-
-                    metrics[test_name]["binary_metrics"] = {
-                        "original_size": format_bytes(orig_size),
-                        "obfuscated_size": format_bytes(obf_size),
-                        "change_pct": change_str,
-                    }
-                except (json.JSONDecodeError, FileNotFoundError):
-                    metrics[test_name] = {}
+        # only tests that made it into the viewer get a metrics panel, so
+        # reports for the rest are never parsed
+        reports = index_reports(reports_dir)
+        report_files = [reports[name][1] for name in tests if name in reports]
+        # the reports are small, so the time goes into open/read latency which
+        # a handful of threads overlaps nicely
+        loaded_reports = dict(
+            zip(report_files, get_pool().map(load_report, report_files))
+        )
+
+        for test_name in tests:
+            report_type, report_file = reports.get(test_name, (None, None))
+            report = loaded_reports.get(report_file)
+
+            if report is not None:
+                metrics[test_name] = report
+
+                orig_size = binary_sizes.get(f"{test_name}_original{exe_suffix}")
+                obf_size = binary_sizes.get(f"{test_name}_{report_type}{exe_suffix}")
+
+                change_str = "N/A"
+                if orig_size is not None and obf_size is not None and orig_size > 0:
+                    change_pct = (obf_size - orig_size) / orig_size * 100
+                    change_str = f"{change_pct:+.2f}%"
+
+                metrics[test_name]["binary_metrics"] = {
+                    "original_size": format_bytes(orig_size),
+                    "obfuscated_size": format_bytes(obf_size),
+                    "change_pct": change_str,
+                }
             else:
                 metrics[test_name] = {}
 
-    test_options = "\n".join(
-        f'                <option value="{name}">{name}</option>'
-        for name in sorted(tests.keys())
-    )
-
-    html_content = f"""<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Chakravyuha - Visual Comparison Report</title>
-    <style>
-        :root {{
-            --bg-color: #f8f9fa;
-            --container-bg: #ffffff;
-            --header-bg: #2c3e50;
-            --text-color: #343a40;
-            --primary-color: #3498db;
-            --primary-hover: #2980b9;
-            --border-color: #dee2e6;
-            --error-color: #e74c3c;
-        }}
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, 'Helvetica Neue', Arial, sans-serif; background-color: var(--bg-color); color: var(--text-color); padding: 20px; min-height: 100vh; }}
-        .container {{ max-width: 1600px; margin: 0 auto; background: var(--container-bg); border-radius: 8px; box-shadow: 0 6px 20px rgba(0, 0, 0, 0.08); overflow: hidden; }}
-
-        .header {{ background-color: var(--header-bg); color: white; padding: 2rem; text-align: center; }}
-        .header .logo {{ width: 150px; height: 150px; margin: 0 auto 1rem; border-radius: 8px; display: block; }}
-        .header .tagline {{ font-style: italic; font-size: 1.2rem; margin-top: 0; margin-bottom: 0.25rem; color: #ecf0f1; }}
-        .header p {{ margin: 0; color: #bdc3c7; }}
-        h1 {{ font-size: 2em; margin-top: 1rem; font-weight: 600; }}
-
-        .controls {{ padding: 20px; background: #fdfdff; border-bottom: 1px solid var(--border-color); display: flex; gap: 20px; align-items: center; flex-wrap: wrap; }}
-        .controls select, .controls button {{ padding: 10px 18px; border-radius: 6px; border: 1px solid var(--border-color); background: white; font-size: 16px; font-weight: 500; cursor: pointer; transition: all 0.2s ease; }}
-        .controls select {{ min-width: 250px; }}
-        .controls select:hover, .controls select:focus {{ border-color: var(--primary-color); outline: none; box-shadow: 0 0 0 3px rgba(52, 152, 219, 0.1); }}
-        .controls button {{ background-color: var(--primary-color); color: white; border-color: var(--primary-color); }}
-        .controls button:hover {{ background-color: var(--primary-hover); border-color: var(--primary-hover); }}
-
-        .metrics {{ padding: 25px; background-color: #fdfdff; display: none; border-bottom: 1px solid var(--border-color); }}
-        .metrics.show {{ display: block; }}
-        .metrics-grid {{ display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 20px; }}
-        .metric-card {{ background: var(--bg-color); padding: 20px; border-radius: 8px; text-align: center; border: 1px solid var(--border-color); }}
-        .metric-card .value {{ font-size: 2em; font-weight: 600; color: var(--primary-color); margin-bottom: 8px; }}
-        .metric-card .value.small-text {{ font-size: 1.1em; line-height: 1.4; font-weight: 500; color: var(--text-color); }}
-        .metric-card .label {{ color: #495057; font-size: 0.9em; font-weight: 600; text-transform: uppercase; letter-spacing: 0.5px; }}
-        .metric-card .sub-label {{ color: #6c757d; font-size: 0.8em; margin-top: 4px; }}
-
-        .comparison-container {{ padding: 30px; }}
-        .image-container {{ display: flex; gap: 30px; justify-content: center; align-items: flex-start; min-height: 400px; }}
-        .image-wrapper {{ flex: 1; text-align: center; max-width: 50%; }}
-        .image-wrapper h3 {{ margin-bottom: 15px; color: var(--header-bg); font-size: 1.4em; font-weight: 600; padding-bottom: 10px; border-bottom: 2px solid var(--border-color); }}
-        .image-wrapper img {{ max-width: 100%; height: auto; border: 1px solid var(--border-color); border-radius: 8px; background: white; box-shadow: 0 4px 15px rgba(0,0,0,0.07); }}
-
-        .no-data {{ text-align: center; padding: 80px 40px; color: #6c757d; font-size: 1.2em; }}
-        .footer {{ padding: 20px; text-align: center; background-color: var(--header-bg); color: #bdc3c7; font-size: 0.9em; border-top: 1px solid var(--border-color);}}
-    </style>
-</head>
-<body>
-    <div class="container">
-        <div class="header">
-            <img src="../../../assets/chakravyuha_logo.png" alt="Chakravyuha Logo" class="logo">
-            <p class="tagline">The Impenetrable Code Formation</p>
-            <h1>Visual Comparison Report</h1>
-        </div>
-        <div class="controls">
-            <select id="testSelect"><option value="">Select a test...</option>{test_options}</select>
-            <select id="functionSelect" disabled><option value="">Select a function...</option></select>
-            <button onclick="toggleMetrics()">📊 Show Full Report</button>
-        </div>
-        <div class="metrics" id="metrics"><div class="metrics-grid" id="metricsGrid"></div></div>
-        <div class="comparison-container"><div id="imageContainer" class="image-container"><div class="no-data">Select a test and function to view comparison</div></div></div>
-        <div class="footer"><p>Generated by the Chakravyuha LLVM Obfuscator</p></div>
-    </div>
-    <script>
-        const tests = {json.dumps(tests, indent=4)};
-        const metrics = {json.dumps(metrics, indent=4)};
-        let currentTest = '';
-        let currentFunction = '';
-        const testSelect = document.getElementById('testSelect');
-        const funcSelect = document.getElementById('functionSelect');
-        const imageContainer = document.getElementById('imageContainer');
-        const metricsDiv = document.getElementById('metrics');
-        const metricsGrid = document.getElementById('metricsGrid');
-
-        testSelect.addEventListener('change', function(e) {{
-            currentTest = e.target.value;
-            updateFunctionList();
-            updateDisplay();
-            if (metricsDiv.classList.contains('show')) {{ updateMetrics(); }}
-        }});
-
-        funcSelect.addEventListener('change', function(e) {{
-            currentFunction = e.target.value;
-            updateDisplay();
-        }});
-
-        function updateFunctionList() {{
-            funcSelect.innerHTML = '<option value="">Select a function...</option>';
-            funcSelect.disabled = true;
-            if (currentTest && tests[currentTest]) {{
-                funcSelect.disabled = false;
-                const functions = Object.keys(tests[currentTest]).sort((a, b) => a.localeCompare(b, undefined, {{numeric: true}}));
-                functions.forEach(funcKey => {{
-                    const option = document.createElement('option');
-                    option.value = funcKey;
-                    option.textContent = tests[currentTest][funcKey].display_name;
-                    funcSelect.appendChild(option);
-                }});
-                if (functions.length > 0) {{
-                    // Auto-select the first function (often 'main')
-                    const mainFunc = functions.find(f => tests[currentTest][f].display_name === 'main') || functions[0];
-                    funcSelect.value = mainFunc;
-                    currentFunction = mainFunc;
-                }}
-            }}
-        }}
-
-        function updateDisplay() {{
-            if (!currentTest || !currentFunction || !tests[currentTest]?.[currentFunction]) {{
-                imageContainer.innerHTML = '<div class="no-data">Select a test and function to view comparison</div>';
-            }} else {{
-                const images = tests[currentTest][currentFunction];
-                imageContainer.innerHTML = `
-                    <div class="image-wrapper"><h3>Original</h3><img src="../../${{images.original}}" alt="Original CFG"></div>
-                    <div class="image-wrapper"><h3>Obfuscated</h3><img src="../../${{images.obfuscated}}" alt="Obfuscated CFG"></div>`;
-            }}
-        }}
-
-        function toggleMetrics() {{
-            if (!metricsDiv.classList.contains('show')) {{ updateMetrics(); }}
-            metricsDiv.classList.toggle('show');
-        }}
-
-        function updateMetrics() {{
-            if (currentTest && metrics[currentTest] && Object.keys(metrics[currentTest]).length > 0) {{
-                const m = metrics[currentTest];
-                const o = m.obfuscationMetrics || {{}};
-                const cff = o.controlFlowFlattening || {{ "flattenedFunctions": 0, "flattenedBlocks": 0 }};
-                const se = o.stringEncryption || {{ "count": 0 }};
-                const fci = o.fakeCodeInsertion || {{ "insertedBlocks": 0 }};
-                const passes = (o.passesRun || []).join('<br>') || 'None';
-                const attrs = m.outputAttributes || {{}};
-                const bin = m.binary_metrics || {{}};
-                metricsGrid.innerHTML = `
-                    <div class="metric-card"><div class="value">${{bin.change_pct || 'N/A'}}</div><div class="label">Exec Size Change</div><div class="sub-label">${{bin.original_size || '?'}} &rarr; ${{bin.obfuscated_size || '?'}}</div></div>
-                    <div class="metric-card"><div class="value">${{attrs.totalIRSizeChange || 'N/A'}}</div><div class="label">IR Size Change</div><div class="sub-label">${{attrs.originalIRSize || '?'}} &rarr; ${{attrs.obfuscatedIRSize || '?'}}</div></div>
-                    <div class="metric-card"><div class="value">${{cff.flattenedFunctions}}</div><div class="label">Flattened Funcs</div></div>
-                    <div class="metric-card"><div class="value">${{cff.flattenedBlocks}}</div><div class="label">Flattened Blocks</div></div>
-                    <div class="metric-card"><div class="value">${{se.count}}</div><div class="label">Strings Encrypted</div></div>
-                    <div class="metric-card"><div class="value">${{fci.insertedBlocks}}</div><div class="label">Fake Blocks</div></div>
-                    <div class="metric-card"><div class="value small-text">${{passes}}</div><div class="label">Passes Run</div></div>
-                    <div class="metric-card"><div class="value">${{o.cyclesCompleted || 1}}</div><div class="label">Cycles</div></div>`;
-            }} else {{
-                metricsGrid.innerHTML = `<div class="metric-card" style="grid-column: 1 / -1;"><div class="label">No report data. Select a test to see its metrics.</div></div>`;
-            }}
-        }}
-
-        // Initial setup
-        (function() {{
-            if (testSelect.options.length > 1) {{
-                testSelect.value = testSelect.options[1].value;
-                currentTest = testSelect.value;
-                updateFunctionList();
-                updateDisplay();
-            }}
-            updateMetrics();
-        }})();
-    </script>
-</body>
-</html>"""
+    option_html = '                <option value="{0}">{0}</option>'.format
+    test_options = "\n".join(map(option_html, sorted(tests)))
+
+    # the page only inlines the test list; each test's images and metrics go
+    # to data/<test>.js, which the page loads when that test is selected.
+    data_dir = comparison_dir / "data"
+    data_dir.mkdir(exist_ok=True)
+    for test_name, functions in tests.items():
+        with open(data_dir / f"{test_name}.js", "w", encoding="utf-8") as f:
+            key = json_dumps(test_name)
+            f.write(f"tests[{key}] = {json_dumps(functions)};\n")
+            f.write(f"metrics[{key}] = {json_dumps(metrics.get(test_name, {}))};\n")
+
+    # stream the template out piece by piece rather than assembling the whole
+    # page in memory
+    placeholders = {"TEST_OPTIONS": test_options}
+    for placeholder, source in page_assets.items():
+        placeholders[placeholder] = publish_asset(source, comparison_dir)
+    template_parts = placeholder_re.split(template_file.read_text(encoding="utf-8"))
 
     html_file = comparison_dir / "index.html"
     with open(html_file, "w", encoding="utf-8") as f:
-        f.write(html_content)
+        for i, part in enumerate(template_parts):
+            f.write(part if i % 2 == 0 else placeholders[part])
     print(f"created comparison viewer at {html_file}")
     return html_file
 
@@ -413,12 +649,13 @@ def view_report(report_path):
 
 
 def main():
-    if platform.system() == "Darwin":
+    # homebrew's llvm is only needed when no opt is reachable already, which
+    # saves the `brew --prefix` call on machines that have llvm on the path
+    if platform.system() == "Darwin" and not (
+        os.environ.get("CHAKRAVYUHA_OPT") or shutil.which("opt")
+    ):
         try:
-            result = subprocess.run(
-                ["brew", "--prefix", "llvm"], capture_output=True, text=True, check=True
-            )
-            llvm_bin_dir = Path(result.stdout.strip()) / "bin"
+            llvm_bin_dir = Path(homebrew_llvm_prefix()) / "bin"
             if llvm_bin_dir.exists():
                 os.environ["PATH"] = str(llvm_bin_dir) + os.pathsep + os.environ["PATH"]
         except (subprocess.CalledProcessError, FileNotFoundError):
@@ -437,9 +674,10 @@ def main():
     )
     args = parser.parse_args()
 
-    if generate_visualizations():
-        report_path = create_comparison_html()
-        if args.action == "view":
+    context = generate_visualizations()
+    if context:
+        report_path = create_comparison_html(context)
+        if report_path and args.action == "view":
             view_report(report_path)
 
 
@@ -1,10 +1,17 @@
 #!/usr/bin/env python3
 import argparse
+import atexit
+import contextlib
+import hashlib
+import io
 import os
 import platform
+import re
 import shutil
 import subprocess
 import sys
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from pathlib import Path
 
 # --- Configuration ---
@@ -14,6 +21,21 @@ BUILD_DIR = PROJECT_ROOT / "build"
 TEST_SRC_DIR = SCRIPT_DIR / "tests"
 RESULTS_DIR = SCRIPT_DIR / "test_results"
 
+# --- Platform ---
+SYSTEM = platform.system()
+# Python's own fds are non-inheritable, so on POSIX closing them in the
+# child buys nothing; leaving close_fds off lets subprocess use posix_spawn
+# (vfork) instead of fork+exec for the absolute tool and binary paths used
+# here. Python 3.13+ takes that path with close_fds=True as well. On Windows
+# the flag would let each child inherit every inheritable handle, including
+# the pipes another thread is creating for its own child at the same time.
+SPAWN_KWARGS = {"close_fds": False} if SYSTEM != "Windows" else {}
+EXE_SUFFIX = ".exe" if SYSTEM == "Windows" else ""
+IS_WSL = "microsoft" in platform.uname().release.lower()
+# Linux-side PATH entries; /mnt/ holds the Windows drives, whose tools must
+# not shadow the Linux LLVM toolchain.
+WSL_LINUX_PATH_RE = re.compile(r"/(?!mnt/)")
+
 # --- Pass Pipelines ---
 PASS_PIPELINES = {
     "full": (
@@ -38,6 +60,17 @@ class Colors:
 
 
 # --- Helper Functions ---
+def available_cpus():
+    """Returns how many CPUs this process may run on.
+
+    os.cpu_count() counts every CPU on the host, while containers and CI
+    runners often restrict the affinity mask to fewer.
+    """
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
 def find_exec(name, msg):
     exec_path = shutil.which(name)
     if not exec_path:
@@ -46,16 +79,10 @@ def find_exec(name, msg):
     return Path(exec_path)
 
 
-def is_wsl():
-    """Check if the script is running inside WSL."""
-    return "microsoft" in platform.uname().release.lower()
-
-
 def find_pass_plugin():
-    system = platform.system()
-    if system == "Windows":
+    if SYSTEM == "Windows":
         plugin_name = "ChakravyuhaPasses.dll"
-    elif system == "Darwin":
+    elif SYSTEM == "Darwin":
         plugin_name = "ChakravyuhaPasses.dylib"
     else:
         plugin_name = "ChakravyuhaPasses.so"
@@ -79,18 +106,20 @@ def find_pass_plugin():
 
 
 def run_command(cmd_args, log_file=None, env=None):
+    """Run a command given as a list of strings; returns (success, output)."""
     try:
-        cmd_args_str = [str(arg) for arg in cmd_args]
-        process_kwargs = {"check": True, "text": True, "env": env}
+        process_kwargs = {"check": True, "text": True, "env": env, **SPAWN_KWARGS}
         if log_file:
             with open(log_file, "w") as f:
                 subprocess.run(
-                    cmd_args_str, stdout=f, stderr=subprocess.STDOUT, **process_kwargs
+                    cmd_args, stdout=f, stderr=subprocess.STDOUT, **process_kwargs
                 )
         else:
+            # Only stderr is ever reported (compiler diagnostics go there),
+            # so stdout is dropped rather than piped back and discarded.
             subprocess.run(
-                cmd_args_str,
-                stdout=subprocess.PIPE,
+                cmd_args,
+                stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 **process_kwargs,
             )
@@ -106,8 +135,35 @@ def run_command(cmd_args, log_file=None, env=None):
         return False, f"Command not found: {cmd_args[0]}"
 
 
+def files_equal(path_a, path_b, block_size=65536):
+    """Compare two files block by block, stopping at the first difference."""
+    if os.path.getsize(path_a) != os.path.getsize(path_b):
+        return False
+    with open(path_a, "rb") as fa, open(path_b, "rb") as fb:
+        while True:
+            block_a, block_b = fa.read(block_size), fb.read(block_size)
+            if block_a != block_b:
+                return False
+            if not block_a:
+                return True
+
+
 # --- Main Test Logic ---
-def run_test(test_file, pipeline_name, pass_plugin_path, compiler, opt, env):
+def build_original(
+    compiler, original_ll, original_bin, original_out, env, hash_file, source_hash
+):
+    """Compile and run the unobfuscated binary; returns an error or None."""
+    success, out = run_command([compiler, original_ll, "-o", original_bin], env=env)
+    if not success:
+        return f"Failed to compile original binary:\n{out}"
+    success, out = run_command([original_bin], log_file=original_out, env=env)
+    if not success:
+        return f"Failed to run original binary:\n{out}"
+    hash_file.write_text(source_hash)
+    return None
+
+
+def run_test(test_file, pipeline_name, opt_argv, compiler, env, keep_ll=False):
     test_name = test_file.stem
     print(
         f"{Colors.YELLOW}--- Testing: {test_name} (Pipeline: {pipeline_name}) ---{
@@ -115,15 +171,20 @@ def run_test(test_file, pipeline_name, pass_plugin_path, compiler, opt, env):
         }"
     )
 
-    exe_suffix = ".exe" if platform.system() == "Windows" else ""
-    original_bin = RESULTS_DIR / "binaries" / f"{test_name}_original{exe_suffix}"
+    original_bin = RESULTS_DIR / "binaries" / f"{test_name}_original{EXE_SUFFIX}"
     obfuscated_bin = (
-        RESULTS_DIR / "binaries" / f"{test_name}_{pipeline_name}{exe_suffix}"
+        RESULTS_DIR / "binaries" / f"{test_name}_{pipeline_name}{EXE_SUFFIX}"
     )
+    # IR is handed between the stages as bitcode, which is smaller and cheaper
+    # for opt and clang to read back; --keep-ll keeps it as readable text.
+    ir_suffix, stale_suffix = (".ll", ".bc") if keep_ll else (".bc", ".ll")
+    ir_flags = ["-S"] if keep_ll else []
     original_ll, obfuscated_ll = (
-        RESULTS_DIR / "ll_files" / f"{test_name}.ll",
-        RESULTS_DIR / "ll_files" / f"{test_name}_{pipeline_name}.ll",
+        RESULTS_DIR / "ll_files" / f"{test_name}{ir_suffix}",
+        RESULTS_DIR / "ll_files" / f"{test_name}_{pipeline_name}{ir_suffix}",
     )
+    for ir_file in (original_ll, obfuscated_ll):
+        ir_file.with_suffix(stale_suffix).unlink(missing_ok=True)
     report_json, log_file = (
         RESULTS_DIR / "reports" / f"{test_name}_{pipeline_name}.json",
         RESULTS_DIR / "logs" / f"{test_name}_{pipeline_name}.log",
@@ -132,74 +193,114 @@ def run_test(test_file, pipeline_name, pass_plugin_path, compiler, opt, env):
         RESULTS_DIR / "outputs" / f"{test_name}_original.out",
         RESULTS_DIR / "outputs" / f"{test_name}_{pipeline_name}.out",
     )
-
-    print(f"{Colors.CYAN}  [1/4] Compiling to LLVM IR...{Colors.NC}")
-    success, out = run_command(
-        [compiler, "-O0", "-emit-llvm", "-S", test_file, "-o", original_ll], env=env
+    # Commands take plain strings, so the paths they are given are converted once.
+    test_src = str(test_file)
+    original_ll_arg, obfuscated_ll_arg = str(original_ll), str(obfuscated_ll)
+    original_bin_arg, obfuscated_bin_arg = str(original_bin), str(obfuscated_bin)
+
+    # The original IR, binary and output only depend on the source and the
+    # compiler, so they are reused across runs while both are unchanged.
+    hash_file = RESULTS_DIR / "cache" / f"{test_name}.hash"
+    source_hash = hashlib.blake2b(
+        compiler.encode() + b"\0" + test_file.read_bytes(), digest_size=16
+    ).hexdigest()
+    original_cached = (
+        hash_file.exists()
+        and hash_file.read_text() == source_hash
+        and all(p.exists() for p in (original_ll, original_bin, original_out))
     )
-    if not success:
-        print(f"{Colors.RED}  ✗ Failed to compile to IR:\n{out}{Colors.NC}")
-        return False
 
-    print(
-        f"{Colors.CYAN}  [2/4] Applying obfuscation and generating report...{Colors.NC}"
-    )
-    full_pipeline = f"{PASS_PIPELINES[pipeline_name]},chakravyuha-emit-report"
-    cmd_unified = [
-        opt,
-        f"-load-pass-plugin={pass_plugin_path}",
-        f"-passes={full_pipeline}",
-        original_ll,
-        "-S",
-    ]
+    if original_cached:
+        print(f"{Colors.CYAN}  [1/4] LLVM IR is up to date.{Colors.NC}")
+    else:
+        hash_file.unlink(missing_ok=True)
+        print(f"{Colors.CYAN}  [1/4] Compiling to LLVM IR...{Colors.NC}")
+        success, out = run_command(
+            [compiler, "-O0", "-emit-llvm", *ir_flags, test_src, "-o", original_ll_arg],
+            env=env,
+        )
+        if not success:
+            print(f"{Colors.RED}  ✗ Failed to compile to IR:\n{out}{Colors.NC}")
+            return False
 
-    try:
-        with open(obfuscated_ll, "w") as f_ll:
-            result = subprocess.run(
-                [str(c) for c in cmd_unified],
-                check=True,
-                text=True,
-                stdout=f_ll,
-                stderr=subprocess.PIPE,
-                env=env,
+    # The original binary only needs the IR from step 1, so it is built and
+    # run in the background while opt works on the obfuscated copy; leaving
+    # the block waits for it on every path, including early failures.
+    with ThreadPoolExecutor(max_workers=1) as background:
+        original_job = None
+        if not original_cached:
+            original_job = background.submit(
+                build_original,
+                compiler,
+                original_ll_arg,
+                original_bin_arg,
+                original_out,
+                env,
+                hash_file,
+                source_hash,
             )
-        with open(report_json, "w") as f_json:
-            f_json.write(result.stderr)
 
-    except subprocess.CalledProcessError as e:
-        print(f"{Colors.RED}  ✗ Obfuscation or reporting pass failed!{Colors.NC}")
-        with open(log_file, "w") as f_log:
-            f_log.write(
-                "--- STDOUT ---\n"
-                + (e.stdout or "(empty)")
-                + "\n--- STDERR ---\n"
-                + (e.stderr or "(empty)")
-            )
-        print(f"  Check log for details: {log_file}")
-        return False
+        print(
+            f"{Colors.CYAN}  [2/4] Applying obfuscation and generating report...{Colors.NC}"
+        )
+        cmd_unified = [
+            *opt_argv,
+            original_ll_arg,
+            *ir_flags,
+            "-o",
+            obfuscated_ll_arg,
+        ]
 
-    print(f"{Colors.CYAN}  [3/4] Compiling binaries...{Colors.NC}")
-    success, out = run_command([compiler, original_ll, "-o", original_bin], env=env)
-    if not success:
-        print(f"{Colors.RED}  ✗ Failed to compile original binary:\n{out}{Colors.NC}")
-        return False
-    success, out = run_command([compiler, obfuscated_ll, "-o", obfuscated_bin], env=env)
-    if not success:
-        print(f"{Colors.RED}  ✗ Failed to compile obfuscated binary:\n{out}{Colors.NC}")
-        return False
+        # The report pass prints its JSON to stderr, so opt writes that
+        # straight into the report file; on failure it holds the diagnostics.
+        try:
+            with open(report_json, "w") as f_json:
+                subprocess.run(
+                    cmd_unified,
+                    check=True,
+                    text=True,
+                    stdout=subprocess.PIPE,
+                    stderr=f_json,
+                    env=env,
+                    **SPAWN_KWARGS,
+                )
 
-    print(f"{Colors.CYAN}  [4/4] Running and comparing output...{Colors.NC}")
-    success, out = run_command([original_bin], log_file=original_out, env=env)
-    if not success:
-        print(f"{Colors.RED}  ✗ Failed to run original binary:\n{out}{Colors.NC}")
-        return False
-    success, out = run_command([obfuscated_bin], log_file=obfuscated_out, env=env)
-    if not success:
-        print(f"{Colors.RED}  ✗ Failed to run obfuscated binary:\n{out}{Colors.NC}")
-        return False
+        except subprocess.CalledProcessError as e:
+            print(f"{Colors.RED}  ✗ Obfuscation or reporting pass failed!{Colors.NC}")
+            stderr_text = report_json.read_text()
+            report_json.unlink()  # not a report, and the log keeps the text
+            with open(log_file, "w") as f_log:
+                f_log.write(
+                    "--- STDOUT ---\n"
+                    + (e.stdout or "(empty)")
+                    + "\n--- STDERR ---\n"
+                    + (stderr_text or "(empty)")
+                )
+            print(f"  Check log for details: {log_file}")
+            return False
+
+        print(f"{Colors.CYAN}  [3/4] Compiling binaries...{Colors.NC}")
+        success, out = run_command(
+            [compiler, obfuscated_ll_arg, "-o", obfuscated_bin_arg], env=env
+        )
+        if not success:
+            print(
+                f"{Colors.RED}  ✗ Failed to compile obfuscated binary:\n{out}{Colors.NC}"
+            )
+            return False
 
-    with open(original_out, "r") as f1, open(obfuscated_out, "r") as f2:
-        if f1.read() == f2.read():
+        print(f"{Colors.CYAN}  [4/4] Running and comparing output...{Colors.NC}")
+        success, out = run_command(
+            [obfuscated_bin_arg], log_file=obfuscated_out, env=env
+        )
+        if not success:
+            print(f"{Colors.RED}  ✗ Failed to run obfuscated binary:\n{out}{Colors.NC}")
+            return False
+        if original_job and (error := original_job.result()):
+            print(f"{Colors.RED}  ✗ {error}{Colors.NC}")
+            return False
+
+        if files_equal(original_out, obfuscated_out):
             print(f"{Colors.GREEN}  ✓ Test Passed: Outputs match!{Colors.NC}\n\n")
             return True
         else:
@@ -207,6 +308,38 @@ def run_test(test_file, pipeline_name, pass_plugin_path, compiler, opt, env):
             return False
 
 
+def run_test_job(
+    test_file,
+    pipeline_name,
+    opt_argv,
+    clang,
+    clang_plus_plus,
+    env,
+    keep_ll=False,
+):
+    """Runs one test in a pool worker and returns (passed, console output).
+
+    The output is buffered so tests running side by side don't interleave.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        if test_file.suffix == ".cpp":
+            compiler_to_use = clang_plus_plus
+            print(f"{Colors.CYAN}Detected C++ test: {test_file.name}{Colors.NC}")
+        else:
+            compiler_to_use = clang
+            print(f"{Colors.CYAN}Detected C test: {test_file.name}{Colors.NC}")
+        passed = run_test(
+            test_file,
+            pipeline_name,
+            opt_argv,
+            compiler_to_use,
+            env,
+            keep_ll,
+        )
+    return passed, output.getvalue()
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Run the Chakravyuha LLVM Obfuscator test suite."
@@ -214,19 +347,27 @@ def main():
     parser.add_argument(
         "--pipeline", default="full", choices=list(PASS_PIPELINES.keys())
     )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=available_cpus(),
+        help="Number of tests to run in parallel (default: usable CPUs).",
+    )
+    parser.add_argument(
+        "--keep-ll",
+        action="store_true",
+        help="Write textual .ll IR instead of bitcode, for reading it.",
+    )
     args = parser.parse_args()
 
-    if is_wsl():
+    if IS_WSL:
         print(f"{Colors.CYAN}WSL environment detected. Sanitizing PATH.{Colors.NC}")
         original_path = os.environ.get("PATH", "")
-        linux_paths = [
-            p
-            for p in original_path.split(os.pathsep)
-            if p.startswith("/") and not p.startswith("/mnt/")
-        ]
+        linux_paths = filter(WSL_LINUX_PATH_RE.match, original_path.split(os.pathsep))
         os.environ["PATH"] = os.pathsep.join(linux_paths)
 
-    if platform.system() == "Darwin":
+    if SYSTEM == "Darwin":
         try:
             result = subprocess.run(
                 ["brew", "--prefix", "llvm"], capture_output=True, text=True, check=True
@@ -259,18 +400,27 @@ def main():
     )
 
     pass_plugin_path = find_pass_plugin()
+    # Every test runs opt with the same plugin and pipeline, so that part of
+    # its command line is built once and shared with the workers.
+    opt_argv = (
+        str(opt),
+        f"-load-pass-plugin={pass_plugin_path}",
+        f"-passes={PASS_PIPELINES[args.pipeline]},chakravyuha-emit-report",
+    )
     env = os.environ.copy()
+    # A crashing pass should fail its test quickly instead of waiting on the
+    # system crash reporter for every opt/clang process that goes down.
+    env.setdefault("LLVM_DISABLE_CRASH_REPORT", "1")
 
     llvm_bin_dir = opt.parent
-    system = platform.system()
-    if system == "Windows":
+    if SYSTEM == "Windows":
         print(
             f"{Colors.CYAN}Windows detected. Adding '{
                 llvm_bin_dir
             }' to PATH for subprocesses.{Colors.NC}"
         )
         env["PATH"] = str(llvm_bin_dir) + os.pathsep + env.get("PATH", "")
-    elif system == "Darwin":
+    elif SYSTEM == "Darwin":
         llvm_lib_dir = llvm_bin_dir.parent / "lib"
         if llvm_lib_dir.exists():
             print(
@@ -281,33 +431,57 @@ def main():
             env["DYLD_LIBRARY_PATH"] = (
                 str(llvm_lib_dir) + os.pathsep + env.get("DYLD_LIBRARY_PATH", "")
             )
-
-    for subdir in ["ll_files", "binaries", "reports", "logs", "outputs"]:
+    elif SYSTEM == "Linux" and os.access("/dev/shm", os.W_OK):
+        # The object files clang writes while linking each binary are thrown
+        # away straight after, so keep them on tmpfs instead of the disk.
+        scratch_dir = tempfile.mkdtemp(prefix="chakravyuha-", dir="/dev/shm")
+        atexit.register(shutil.rmtree, scratch_dir, ignore_errors=True)
+        env["TMPDIR"] = scratch_dir
+
+    for subdir in ["ll_files", "binaries", "reports", "logs", "outputs", "cache"]:
         (RESULTS_DIR / subdir).mkdir(parents=True, exist_ok=True)
 
-    c_files = list(TEST_SRC_DIR.glob("test_*.c"))
-    cpp_files = list(TEST_SRC_DIR.glob("test_*.cpp"))
-    test_files = sorted(c_files + cpp_files)
+    with os.scandir(TEST_SRC_DIR) as entries:
+        test_files = sorted(
+            Path(entry.path)
+            for entry in entries
+            if entry.name.startswith("test_") and entry.name.endswith((".c", ".cpp"))
+        )
 
     if not test_files:
         print(f"{Colors.RED}Error: No test files found in '{TEST_SRC_DIR}'.{Colors.NC}")
         sys.exit(1)
 
+    # Tests are independent and mostly wait on clang/opt, so they run side by
+    # side; each one's output is printed in one piece as it finishes.
     passed_count, failed_count = 0, 0
-    for test_file in test_files:
-        if test_file.suffix == ".cpp":
-            compiler_to_use = clang_plus_plus
-            print(f"{Colors.CYAN}Detected C++ test: {test_file.name}{Colors.NC}")
-        else:
-            compiler_to_use = clang
-            print(f"{Colors.CYAN}Detected C test: {test_file.name}{Colors.NC}")
-
-        if run_test(
-            test_file, args.pipeline, pass_plugin_path, compiler_to_use, opt, env
-        ):
-            passed_count += 1
-        else:
-            failed_count += 1
+    jobs = max(1, args.jobs)
+    if SYSTEM == "Windows":
+        # ProcessPoolExecutor refuses more than 61 workers on Windows, which
+        # the CPU-count default exceeds on large hosts.
+        jobs = min(jobs, 61)
+    sys.stdout.flush()  # keep forked workers from inheriting buffered output
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(
+                run_test_job,
+                test_file,
+                args.pipeline,
+                opt_argv,
+                str(clang),
+                str(clang_plus_plus),
+                env,
+                args.keep_ll,
+            )
+            for test_file in test_files
+        ]
+        for future in as_completed(futures):
+            passed, output = future.result()
+            print(output, end="", flush=True)
+            if passed:
+                passed_count += 1
+            else:
+                failed_count += 1
 
     print(
         "\n"